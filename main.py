@@ -1,13 +1,20 @@
-import random
 import discord
 from discord.ext import commands, tasks
 import aiohttp
+import aiosqlite
+import yarl
 import asyncio
-import json
+import orjson
 import os
 from datetime import datetime
 import logging
-from typing import Dict, List, Optional, Set
+import functools
+import itertools
+import time
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
 from enum import Enum
 from dotenv import load_dotenv
 load_dotenv()
@@ -16,6 +23,48 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Discord caps the number of embeds in a single message
+MAX_EMBEDS_PER_MESSAGE = 10
+
+# Cap on listings posted per config per poll; the rest are still marked seen
+MAX_NEW_LISTINGS_PER_CHECK = 10
+
+# Batches larger than this build their embeds in worker threads
+THREADED_EMBED_THRESHOLD = 5
+
+_ITEM_URL = "https://csfloat.com/item/"
+_LISTINGS_URL = yarl.URL("https://csfloat.com/api/v1/listings")
+_STEAM_CDN = "https://steamcommunity-a.akamaihd.net/economy/image/"
+
+# key=value pairs for !track, and numeric values (any matched group means a float)
+_PARAM_RE = re.compile(r'([^\s=]+)=(\S+)')
+_NUM_RE = re.compile(r'-?(?:\d+(\.\d*)?|(\.\d+))')
+
+@functools.lru_cache(maxsize=4096)
+def _parse_timestamp(created_at: str) -> datetime:
+    """Parse an API ISO-8601 timestamp, caching repeats across configs"""
+    return datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+
+@functools.lru_cache(maxsize=4096)
+def _divergence(price_cents: int, pred_cents: int) -> tuple[str, str, float]:
+    """Return (emoji, formatted text, percentage) for price vs predicted price"""
+    price_usd = price_cents / 100
+    predicted_price = pred_cents / 100
+    
+    # Positive = price is higher than predicted (expensive)
+    # Negative = price is lower than predicted (discount/deal)
+    divergence_pct = ((price_usd - predicted_price) / predicted_price) * 100
+    
+    if divergence_pct > 0:
+        return "📈", f"+{divergence_pct:.1f}%", divergence_pct  # Price above prediction
+    elif divergence_pct < 0:
+        return "📉", f"{divergence_pct:.1f}%", divergence_pct  # Price below prediction (discount)
+    return "⚖️", "0.0%", divergence_pct  # Exact match
+
+def build_listings_url(params: Dict) -> yarl.URL:
+    """Build the listings query URL; params are sorted so equal queries give equal URLs"""
+    return _LISTINGS_URL.with_query(sorted(params.items()))
+
 class SortOption(Enum):
     """Available sorting options for CS Float listings"""
     BEST_DEAL = "best_deal"
@@ -27,6 +76,10 @@ class SortOption(Enum):
     HIGHEST_FLOAT = "highest_float"
     CREATED_AT = "created_at"
 
+# Precomputed for cheap sort_by validation
+_SORT_VALUES = frozenset(opt.value for opt in SortOption)
+_VALID_OPTIONS_STR = ', '.join(opt.value for opt in SortOption)
+
 class CSFloatBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.default()
@@ -37,74 +90,238 @@ class CSFloatBot(commands.Bot):
         self.csfloat_api_key = os.getenv('CSFLOAT_API_KEY')  # Optional for public endpoints
         self.discord_token = os.getenv('DISCORD_TOKEN')
         self.channel_id = int(os.getenv('CHANNEL_ID', 0))
+        self._channel: Optional[discord.abc.Messageable] = None
         
         # Tracking data
-        self.seen_listings: Set[str] = set()
+        # Bounded LRU of listing IDs; least recently seen are evicted past the cap
+        self.seen_listings: OrderedDict[str, None] = OrderedDict()
+        self.max_seen_listings = int(os.getenv('MAX_SEEN_LISTINGS', 50_000))
         self.tracking_configs: Dict[str, Dict] = {}
         
+        # Persistent store so seen listings survive restarts
+        self.seen_db_path = os.getenv('SEEN_DB_PATH', 'seen.db')
+        self.seen_retention = int(os.getenv('SEEN_RETENTION_DAYS', 7)) * 86400
+        self.db: Optional[aiosqlite.Connection] = None
+        self._pending_seen: List[Tuple[str, int]] = []
+        
+        # Per-config polling tasks with adaptive intervals (seconds)
+        self.poll_min_interval = float(os.getenv('POLL_MIN_INTERVAL', 30))
+        self.poll_max_interval = float(os.getenv('POLL_MAX_INTERVAL', 300))
+        self._poll_tasks: Dict[str, asyncio.Task] = {}
+        
         # Session for HTTP requests
         self.session: Optional[aiohttp.ClientSession] = None
         
+        # Caps concurrent outbound CS Float API requests
+        self.fetch_sem: Optional[asyncio.Semaphore] = None
+        
+        # Coalesces identical API queries across overlapping tracking configs.
+        # Kept well below the poll interval so a config's next poll never gets
+        # its own previous result back from the cache.
+        self.fetch_cache_ttl = min(
+            float(os.getenv('FETCH_CACHE_TTL', 5)),
+            self.poll_min_interval / 2
+        )
+        self._inflight: Dict[yarl.URL, asyncio.Future] = {}
+        self._cache: Dict[yarl.URL, Tuple[float, List[Dict]]] = {}
+        
     async def setup_hook(self):
         """Initialize the bot"""
-        self.session = aiohttp.ClientSession()
+        concurrency = int(os.getenv('CSFLOAT_CONCURRENCY', '8'))
+        
+        # Reuse pooled keep-alive connections across poll cycles
+        connector = aiohttp.TCPConnector(
+            limit=32,
+            limit_per_host=concurrency,
+            keepalive_timeout=75,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True
+        )
+        timeout = aiohttp.ClientTimeout(total=15, connect=5)
+        headers = {'User-Agent': 'CSFloatBot/1.0'}
+        if self.csfloat_api_key:
+            headers['Authorization'] = self.csfloat_api_key
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers=headers
+        )
+        self.fetch_sem = asyncio.Semaphore(concurrency)
+        
+        await self._load_seen_listings()
+        self.prune_seen_listings.start()
         logger.info("Bot setup completed")
         
     async def close(self):
         """Clean up resources"""
+        # Stop background work first so nothing is mid-request when the session closes
+        tasks_to_stop = [*self._poll_tasks.values(), *self._inflight.values()]
+        prune_task = self.prune_seen_listings.get_task()
+        if prune_task:
+            tasks_to_stop.append(prune_task)
+        self.prune_seen_listings.cancel()
+        for task in tasks_to_stop:
+            task.cancel()
+        await asyncio.gather(*tasks_to_stop, return_exceptions=True)
+        self._poll_tasks.clear()
+        
         if self.session:
             await self.session.close()
+        if self.db:
+            await self._flush_seen()
+            await self.db.close()
         await super().close()
         
     async def on_ready(self):
         """Bot ready event"""
         logger.info(f'{self.user} has connected to Discord!')
-        if not self.check_listings.is_running():
-            self.check_listings.start()
+        await self._resolve_channel()
+    
+    async def on_resumed(self):
+        """Re-resolve the notification channel after a reconnect"""
+        await self._resolve_channel()
+    
+    async def _resolve_channel(self):
+        """Resolve and cache the notification channel object"""
+        try:
+            self._channel = self.get_channel(self.channel_id) or await self.fetch_channel(self.channel_id)
+        except discord.DiscordException as e:
+            self._channel = None
+            logger.warning(f"Could not resolve channel with ID {self.channel_id}: {e}")
             
-    async def fetch_listings(self, **params) -> List[Dict]:
-        """Fetch listings from CS Float API"""
-        base_url = "https://csfloat.com/api/v1/listings"
-        headers = {}
+    async def fetch_listings(self, url: yarl.URL) -> List[Dict]:
+        """Fetch listings from CS Float API, sharing results between identical queries"""
+        now = time.monotonic()
         
-        if self.csfloat_api_key:
-            headers['Authorization'] = self.csfloat_api_key
-            
+        cached = self._cache.get(url)
+        if cached and now - cached[0] < self.fetch_cache_ttl:
+            return cached[1]
+        
+        future = self._inflight.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._request_listings(url))
+            self._inflight[url] = future
+            future.add_done_callback(lambda f: self._store_result(url, f))
+        
+        # Shield so one cancelled caller doesn't cancel the request for the others
+        listings = await asyncio.shield(future)
+        return listings if listings is not None else []
+    
+    def _store_result(self, key: yarl.URL, future: asyncio.Future):
+        """Cache a finished request and prune expired cache entries"""
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.result() is None:
+            return
+        
+        now = time.monotonic()
+        self._cache = {k: v for k, v in self._cache.items() if now - v[0] < self.fetch_cache_ttl}
+        self._cache[key] = (now, future.result())
+    
+    async def _request_listings(self, url: yarl.URL) -> Optional[List[Dict]]:
+        """Perform the HTTP request, returning None on failure so errors aren't cached"""
         try:
-            async with self.session.get(base_url, params=params, headers=headers) as response:
-                if response.status == 200:
-                    response_data = await response.json()
-                    # CS Float API returns data wrapped in a 'data' key
-                    return response_data.get('data', [])
-                else:
-                    logger.error(f"API request failed with status {response.status}")
-                    logger.error(f"Response: {response}")
-                    return []
+            async with self.fetch_sem:
+                async with self.session.get(url) as response:
+                    if response.status == 200:
+                        response_data = orjson.loads(await response.read())
+                        # CS Float API returns data wrapped in a 'data' key
+                        return response_data.get('data', [])
+                    else:
+                        # Lazy formatting so the response repr is only built if emitted
+                        if logger.isEnabledFor(logging.ERROR):
+                            logger.error("API request failed status=%s response=%r", response.status, response)
+                        return None
         except Exception as e:
             logger.error(f"Error fetching listings: {e}")
-            return []
+            return None
+    
+    def _mark_seen(self, listings: Iterable[Dict]) -> List[Dict]:
+        """Record listings as seen in one pass, returning the ones not seen before"""
+        seen = self.seen_listings
+        now = int(time.time())
+        pending = self._pending_seen
+        new_listings = []
+        for listing in listings:
+            listing_id = listing['id']
+            if listing_id in seen:
+                seen.move_to_end(listing_id)
+            else:
+                new_listings.append(listing)
+            # Hits are queued too so their timestamps stay fresh in the database
+            pending.append((listing_id, now))
+        
+        # New IDs go in with a single bulk update
+        seen.update(dict.fromkeys(listing['id'] for listing in new_listings))
+        for _ in range(len(seen) - self.max_seen_listings):
+            seen.popitem(last=False)
+        return new_listings
+    
+    async def _load_seen_listings(self):
+        """Open the seen-listings database and load recent IDs into memory"""
+        self.db = await aiosqlite.connect(self.seen_db_path)
+        await self.db.execute("CREATE TABLE IF NOT EXISTS seen(id TEXT PRIMARY KEY, ts INTEGER)")
+        await self.db.commit()
+        
+        cutoff = int(time.time()) - self.seen_retention
+        async with self.db.execute(
+            "SELECT id FROM seen WHERE ts > ? ORDER BY ts DESC LIMIT ?",
+            (cutoff, self.max_seen_listings)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        
+        # Oldest first so eviction order matches insertion order
+        self.seen_listings.update(dict.fromkeys(row[0] for row in reversed(rows)))
+        logger.info(f"Loaded {len(rows)} seen listings from {self.seen_db_path}")
+    
+    async def _flush_seen(self):
+        """Write queued seen listing IDs to the database in one batch"""
+        if not self.db or not self._pending_seen:
+            return
+        pending, self._pending_seen = self._pending_seen, []
+        try:
+            await self.db.executemany(
+                "INSERT INTO seen(id, ts) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET ts=excluded.ts",
+                pending
+            )
+            await self.db.commit()
+        except Exception as e:
+            logger.error(f"Error persisting seen listings: {e}")
+    
+    @tasks.loop(hours=24)
+    async def prune_seen_listings(self):
+        """Drop seen listings older than the retention window"""
+        cutoff = int(time.time()) - self.seen_retention
+        try:
+            await self.db.execute("DELETE FROM seen WHERE ts < ?", (cutoff,))
+            await self.db.commit()
+        except Exception as e:
+            logger.error(f"Error pruning seen listings: {e}")
     
     def create_listing_embed(self, listing: Dict) -> discord.Embed:
         """Create a Discord embed for a listing"""
+        listing_id = listing['id']
         item = listing['item']
         seller = listing['seller']
         
         # Create embed
         embed = discord.Embed(
-            title=f"{item['market_hash_name']}",
-            url=f"https://csfloat.com/item/{listing['id']}",
+            title=item['market_hash_name'],
+            url=f"{_ITEM_URL}{listing_id}",
             color=discord.Color.blue(),
-            timestamp=datetime.fromisoformat(listing['created_at'].replace('Z', '+00:00'))
+            timestamp=_parse_timestamp(listing['created_at'])
         )
+        # Fields are collected as plain dicts and assigned in one go below
+        fields = []
+        add = fields.append
         
         # Add item details
         price_usd = listing['price'] / 100  # Convert cents to dollars
-        embed.add_field(name="💰 Price", value=f"${price_usd:.2f}", inline=True)
-        embed.add_field(name="🎯 Float", value=f"{item['float_value']:.6f}", inline=True)
-        embed.add_field(name="🎨 Paint Seed", value=item.get('paint_seed', 'N/A'), inline=True)
+        add({'name': "💰 Price", 'value': f"${price_usd:.2f}", 'inline': True})
+        add({'name': "🎯 Float", 'value': f"{item['float_value']:.6f}", 'inline': True})
+        add({'name': "🎨 Paint Seed", 'value': str(item.get('paint_seed', 'N/A')), 'inline': True})
         
         # Add wear condition
-        embed.add_field(name="👕 Condition", value=item.get('wear_name', 'Unknown'), inline=True)
+        add({'name': "👕 Condition", 'value': str(item.get('wear_name', 'Unknown')), 'inline': True})
         
         # Add StatTrak/Souvenir info
         special = []
@@ -113,15 +330,15 @@ class CSFloatBot(commands.Bot):
         if item.get('is_souvenir'):
             special.append("Souvenir")
         if special:
-            embed.add_field(name="✨ Special", value=" | ".join(special), inline=True)
+            add({'name': "✨ Special", 'value': " | ".join(special), 'inline': True})
         else:
-            embed.add_field(name="📊 Rarity", value=f"Grade {item.get('rarity', 'Unknown')}", inline=True)
+            add({'name': "📊 Rarity", 'value': f"Grade {item.get('rarity', 'Unknown')}", 'inline': True})
             
         # Add seller info (handle obfuscated sellers)
         seller_name = seller.get('username', 'Anonymous')
         if not seller_name and seller.get('obfuscated_id'):
             seller_name = f"User {seller['obfuscated_id'][:8]}..."
-        embed.add_field(name="👤 Seller", value=seller_name, inline=True)
+        add({'name': "👤 Seller", 'value': str(seller_name), 'inline': True})
         
         # Add reference price info and divergence calculation
         reference = listing.get('reference', {})
@@ -130,110 +347,127 @@ class CSFloatBot(commands.Bot):
             base_price = reference.get('base_price', 0) / 100
             
             if predicted_price > 0:
-                embed.add_field(name="📈 Predicted", value=f"${predicted_price:.2f}", inline=True)
+                add({'name': "📈 Predicted", 'value': f"${predicted_price:.2f}", 'inline': True})
                 
                 # Calculate price divergence percentage
-                # Positive = price is higher than predicted (expensive)
-                # Negative = price is lower than predicted (discount/deal)
-                divergence_pct = ((price_usd - predicted_price) / predicted_price) * 100
-                
-                # Format divergence with appropriate emoji and color coding
-                if divergence_pct > 0:
-                    divergence_emoji = "📈"  # Price above prediction
-                    divergence_text = f"+{divergence_pct:.1f}%"
-                elif divergence_pct < 0:
-                    divergence_emoji = "📉"  # Price below prediction (discount)
-                    divergence_text = f"{divergence_pct:.1f}%"  # Already has negative sign
-                else:
-                    divergence_emoji = "⚖️"  # Exact match
-                    divergence_text = "0.0%"
-                
-                embed.add_field(
-                    name=f"{divergence_emoji} Divergence", 
-                    value=divergence_text, 
-                    inline=True
+                divergence_emoji, divergence_text, _ = _divergence(
+                    listing['price'], reference['predicted_price']
                 )
+                
+                add({'name': f"{divergence_emoji} Divergence", 'value': divergence_text, 'inline': True})
             
             # Keep the old discount field for backward compatibility when price is below predicted
             if base_price > 0 and price_usd < predicted_price:
                 discount_pct = ((predicted_price - price_usd) / predicted_price) * 100
-                embed.add_field(name="💸 Discount", value=f"{discount_pct:.1f}%", inline=True)
+                add({'name': "💸 Discount", 'value': f"{discount_pct:.1f}%", 'inline': True})
         
         # Add stickers if any
         stickers = item.get('stickers', [])
         if stickers:
-            sticker_names = [sticker['name'] for sticker in stickers[:3]]  # Limit to first 3
-            sticker_text = "\n".join(sticker_names)
-            if len(stickers) > 3:
-                sticker_text += f"\n... and {len(stickers) - 3} more"
-            embed.add_field(name="🏷️ Stickers", value=sticker_text, inline=False)
+            sticker_text = "\n".join(sticker['name'] for sticker in itertools.islice(stickers, 3))  # Limit to first 3
+            extra = len(stickers) - 3
+            if extra > 0:
+                sticker_text += f"\n... and {extra} more"
+            add({'name': "🏷️ Stickers", 'value': sticker_text, 'inline': False})
         
         # Add watchers if any
         watchers = listing.get('watchers', 0)
         if watchers > 0:
-            embed.add_field(name="👀 Watchers", value=str(watchers), inline=True)
+            add({'name': "👀 Watchers", 'value': str(watchers), 'inline': True})
         
         # Add item image - handle both old and new icon URL formats
         icon_url = item.get('icon_url', '')
         if icon_url:
-            if icon_url.startswith('http'):
-                embed.set_thumbnail(url=icon_url)
-            elif icon_url.startswith('-9a81'):
-                # Old format - prefix with Steam CDN
-                embed.set_thumbnail(url=f"https://steamcommunity-a.akamaihd.net/economy/image/{icon_url}")
-            else:
-                # New format - likely already includes domain or needs different handling
-                embed.set_thumbnail(url=f"https://steamcommunity-a.akamaihd.net/economy/image/{icon_url}")
+            # Full URLs are used as-is, bare Steam icon hashes get the CDN prefix
+            embed.set_thumbnail(url=icon_url if icon_url.startswith('http') else _STEAM_CDN + icon_url)
         
         # Add description if available
         description = listing.get('description', '')
         if description:
-            embed.add_field(name="📝 Note", value=description[:100] + ("..." if len(description) > 100 else ""), inline=False)
+            add({'name': "📝 Note", 'value': description[:100] + ("..." if len(description) > 100 else ""), 'inline': False})
         
         # Add footer
-        embed.set_footer(text=f"CS Float • ID: {listing['id']}")
+        embed.set_footer(text=f"CS Float • ID: {listing_id}")
+        embed._fields = fields
         
         return embed
     
-    @tasks.loop(seconds=60)
-    async def check_listings(self):
-        """Check for new listings periodically"""
-        if not self.tracking_configs:
-            return
-            
-        channel = self.get_channel(self.channel_id)
-        if not channel:
-            logger.warning(f"Channel with ID {self.channel_id} not found")
-            return
+    def start_polling(self, config_name: str):
+        """Start (or restart) the polling task for a tracking configuration"""
+        self.stop_polling(config_name)
+        self._poll_tasks[config_name] = asyncio.create_task(self._poll_config(config_name))
+    
+    def stop_polling(self, config_name: str):
+        """Cancel the polling task for a tracking configuration, if any"""
+        task = self._poll_tasks.pop(config_name, None)
+        if task:
+            task.cancel()
+    
+    async def _poll_config(self, config_name: str):
+        """Poll one configuration, backing off while it yields nothing new"""
+        await self.wait_until_ready()
+        interval = self.poll_min_interval
+        loop = asyncio.get_running_loop()
+        last_poll = loop.time()
         
-        for config_name, config in self.tracking_configs.items():
-            await asyncio.sleep(random.uniform(0, 1))
-            try:
-                # Fetch listings with the specified parameters
-                listings = await self.fetch_listings(**config['params'])
+        while True:
+            config = self.tracking_configs.get(config_name)
+            if config is None:
+                return
+            
+            # Fire at this config's fractional offset within the interval window,
+            # never sooner than a full interval after the previous scheduled poll.
+            # Slots already missed (e.g. after a slow poll) are skipped, not caught up.
+            earliest = max(last_poll + interval, loop.time())
+            next_tick = earliest - (earliest % interval) + config['phase'] * interval
+            if next_tick < earliest - 1e-3:  # tolerate float rounding at the slot boundary
+                next_tick += interval
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            last_poll = next_tick
+            
+            channel = self._channel
+            if not channel:
+                logger.warning(f"Channel with ID {self.channel_id} not found")
+                continue
+            
+            new_count = await self._process_config(config_name, config, channel)
+            await self._flush_seen()
+            
+            # Snap back on hits, double the interval on empty polls
+            if new_count:
+                interval = self.poll_min_interval
+            else:
+                interval = min(interval * 2, self.poll_max_interval)
+    
+    async def _process_config(self, config_name: str, config: Dict, channel: discord.abc.Messageable) -> int:
+        """Fetch and post new listings for a single tracking configuration, returning how many were new"""
+        try:
+            # Fetch listings with the specified parameters
+            listings = await self.fetch_listings(config['url'])
+            
+            new_listings = self._mark_seen(listings)
+            
+            # Send new listings in batches (Discord allows up to 10 embeds per message)
+            to_post = new_listings[:MAX_NEW_LISTINGS_PER_CHECK]
+            for i in range(0, len(to_post), MAX_EMBEDS_PER_MESSAGE):
+                batch = to_post[i:i + MAX_EMBEDS_PER_MESSAGE]
+                if len(batch) > THREADED_EMBED_THRESHOLD:
+                    # Keep the event loop free for other configs while rendering
+                    embeds = await asyncio.gather(
+                        *(asyncio.to_thread(self.create_listing_embed, listing) for listing in batch)
+                    )
+                else:
+                    embeds = [self.create_listing_embed(listing) for listing in batch]
+                noun = "listing" if len(embeds) == 1 else "listings"
+                await channel.send(f"🆕 **{len(embeds)} new {config_name} {noun}**", embeds=embeds)
                 
-                new_listings = []
-                for listing in listings:
-                    listing_id = listing['id']
-                    if listing_id not in self.seen_listings:
-                        new_listings.append(listing)
-                        self.seen_listings.add(listing_id)
+            if new_listings:
+                logger.info(f"Posted {len(to_post)} of {len(new_listings)} new listings for {config_name}")
+            return len(new_listings)
                 
-                # Send embeds for new listings
-                for listing in new_listings[:5]:  # Limit to 5 new items per check
-                    embed = self.create_listing_embed(listing)
-                    await channel.send(f"🆕 **New {config_name} Listing!**", embed=embed)
-                    
-                if new_listings:
-                    logger.info(f"Posted {len(new_listings)} new listings for {config_name}")
-                    
-            except Exception as e:
-                logger.error(f"Error checking listings for {config_name}: {e}")
-    
-    @check_listings.before_loop
-    async def before_check_listings(self):
-        """Wait for bot to be ready before starting the loop"""
-        await self.wait_until_ready()
+        except Exception as e:
+            logger.error(f"Error checking listings for {config_name}: {e}")
+            return 0
 
 # Bot commands
 bot = CSFloatBot()
@@ -256,69 +490,59 @@ async def track_items(ctx, name: str, def_index: int, paint_index: int, *, param
             'sort_by': SortOption.BEST_DEAL.value  # Default sorting
         }
         
-        if params:
-            for param in params.split():
-                if '=' in param:
-                    key, value = param.split('=', 1)
-                    
-                    # Handle sort_by parameter specially
-                    if key == 'sort_by':
-                        # Validate sort option
-                        try:
-                            sort_value = SortOption(value).value
-                            param_dict[key] = sort_value
-                        except ValueError:
-                            valid_options = [opt.value for opt in SortOption]
-                            await ctx.send(f"❌ Invalid sort option '{value}'. Valid options: {', '.join(valid_options)}")
-                            return
-                    else:
-                        # Convert numeric values
-                        try:
-                            if '.' in value:
-                                param_dict[key] = float(value)
-                            else:
-                                param_dict[key] = int(value)
-                        except ValueError:
-                            param_dict[key] = value
-        
-        # Store tracking configuration
+        for key, value in _PARAM_RE.findall(params):
+            # Handle sort_by parameter specially
+            if key == 'sort_by':
+                # Validate sort option
+                if value not in _SORT_VALUES:
+                    await ctx.send(f"❌ Invalid sort option '{value}'. Valid options: {_VALID_OPTIONS_STR}")
+                    return
+                param_dict[key] = value
+            else:
+                # Convert numeric values
+                num = _NUM_RE.fullmatch(value)
+                if num:
+                    param_dict[key] = float(value) if num.lastindex else int(value)
+                else:
+                    param_dict[key] = value
+        
+        # Store tracking configuration with its prebuilt query URL
+        config_url = build_listings_url(param_dict)
         bot.tracking_configs[name] = {
             'params': param_dict,
+            'url': config_url,
+            # Stable fraction in [0, 1) that staggers configs across any polling window
+            'phase': zlib.crc32(name.encode()) / 2**32,
             'channel': ctx.channel.id
         }
+        bot.start_polling(name)
         
         # Update channel ID if this is the first tracking config
         if len(bot.tracking_configs) == 1:
             bot.channel_id = ctx.channel.id
+            bot._channel = ctx.channel
         
         embed = discord.Embed(
             title="✅ Tracking Started",
             description=f"Now tracking **{name}** items",
             color=discord.Color.green()
         )
-        embed.add_field(name="Parameters", value=json.dumps(param_dict, indent=2), inline=False)
-        
-        await ctx.send(embed=embed)
+        embed.add_field(name="Parameters", value=orjson.dumps(param_dict, option=orjson.OPT_INDENT_2).decode(), inline=False)
         
         # Test the configuration by fetching initial listings
-        initial_listings = await bot.fetch_listings(**param_dict)
+        initial_listings = await bot.fetch_listings(config_url)
         if initial_listings:
             # Mark existing listings as seen to avoid spam
-            for listing in initial_listings:
-                bot.seen_listings.add(listing['id'])
+            bot._mark_seen(initial_listings)
+            await bot._flush_seen()
             
-            embed_copy = discord.Embed(
-                title="✅ Tracking Started",
-                description=f"Now tracking **{name}** items",
-                color=discord.Color.green()
-            )
-            embed_copy.add_field(name="Parameters", value=json.dumps(param_dict, indent=2), inline=False)
-            embed_copy.add_field(
+            embed.add_field(
                 name="Initial Check", 
                 value=f"Found {len(initial_listings)} existing listings (marked as seen)",
                 inline=False
             )
-            await ctx.send(embed=embed_copy)
+        
+        await ctx.send(embed=embed)
         
     except Exception as e:
         await ctx.send(f"❌ Error setting up tracking: {e}")
@@ -328,6 +552,7 @@ async def untrack_items(ctx, name: str):
     """Stop tracking a specific item configuration"""
     if name in bot.tracking_configs:
         del bot.tracking_configs[name]
+        bot.stop_polling(name)
         await ctx.send(f"✅ Stopped tracking **{name}**")
     else:
         await ctx.send(f"❌ No tracking configuration found for **{name}**")
@@ -356,15 +581,12 @@ async def test_fetch(ctx, def_index: int, paint_index: int = None, limit: int =
         params['paint_index'] = paint_index
     
     # Validate sort_by parameter
-    try:
-        sort_value = SortOption(sort_by).value
-        params['sort_by'] = sort_value
-    except ValueError:
-        valid_options = [opt.value for opt in SortOption]
-        await ctx.send(f"❌ Invalid sort option '{sort_by}'. Valid options: {', '.join(valid_options)}")
+    if sort_by not in _SORT_VALUES:
+        await ctx.send(f"❌ Invalid sort option '{sort_by}'. Valid options: {_VALID_OPTIONS_STR}")
         return
+    params['sort_by'] = sort_by
     
-    listings = await bot.fetch_listings(**params)
+    listings = await bot.fetch_listings(build_listings_url(params))
     
     if not listings:
         await ctx.send(f"❌ No listings found for def_index {def_index}" + (f" paint_index {paint_index}" if paint_index else ""))
@@ -458,6 +680,13 @@ if __name__ == "__main__":
         logger.error("CHANNEL_ID environment variable is required")
         exit(1)
     
+    # Use the libuv-backed event loop where available (not supported on Windows)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        logger.info("uvloop not available, using default asyncio event loop")
+    
     try:
         bot.run(bot.discord_token)
     except discord.LoginFailure: